@@ -7,37 +7,399 @@ Handles "out of host capacity" errors by retrying with exponential backoff.
 Uses OCI Python SDK for direct API calls, avoiding CLI parsing issues.
 """
 
+from __future__ import annotations
+
+import functools
 import json
 import logging
+import math
+import random
+import re
 import sys
+import threading
 import time
 import argparse
+import asyncio
+import atexit
 import os
+import queue
+import types
+from bisect import bisect_left
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict, NoReturn, Optional
-
-# OCI SDK imports
-import oci
-from oci.config import from_file
-from oci.core import ComputeClient
-from oci.core.models import (
-    CreateVnicDetails,
-    InstanceSourceViaImageDetails,
-    LaunchInstanceDetails,
-    LaunchInstanceShapeConfigDetails,
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, NamedTuple, NoReturn, Optional, Tuple
+
+# orjson is an optional, faster drop-in for config parsing and payload dumps.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so error handling is shared.
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def _json_loads(data: bytes) -> Any:
+    # Windows editors often save a UTF-8 BOM; json accepts it from bytes, orjson doesn't.
+    if data.startswith(b'\xef\xbb\xbf'):
+        data = data[3:]
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_pretty(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2)
+
+
+# OCI SDK imports are deferred to _lazy_import_oci(): the SDK takes hundreds of ms to
+# import and --help / config validation don't need it.
+if TYPE_CHECKING:
+    import oci
+    from oci.config import from_file
+    from oci.core import ComputeClient
+    from oci.core.models import (
+        CreateVnicDetails,
+        InstanceSourceViaImageDetails,
+        LaunchInstanceDetails,
+        LaunchInstanceShapeConfigDetails,
+    )
+    from oci.exceptions import ServiceError
+
+LOG_FILE = 'oci_provisioning.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Configure logging: callers only enqueue records; file/console I/O happens on the
+# listener thread started by _start_log_listener() so it never stalls the retry loop.
+# The listener starts with main() or the first OCIProvisioner, whichever comes first;
+# anything logged before then is held in the queue and written once it starts.
+_log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue(-1)
+_queue_handler = QueueHandler(_log_queue)
+# Only merge args into the message here; the listener's handlers apply LOG_FORMAT.
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+logger = logging.getLogger(__name__)
+
+
+_log_listener: Optional[QueueListener] = None
+_log_listener_lock = threading.Lock()
+
+
+def _start_log_listener() -> QueueListener:
+    """
+    Start writing queued log records to LOG_FILE and the console; stopped (and flushed)
+    at exit. Safe to call repeatedly: later calls return the running listener.
+    """
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is None:
+            formatter = logging.Formatter(LOG_FORMAT)
+            handlers: List[logging.Handler] = [logging.FileHandler(LOG_FILE), logging.StreamHandler()]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            _log_listener = QueueListener(_log_queue, *handlers, respect_handler_level=True)
+            _log_listener.start()
+            atexit.register(_log_listener.stop)
+        return _log_listener
+
+# Dedicated RNG for retry jitter, seeded from the OS so that concurrent
+# provisioners don't share a schedule.
+_jitter_rng = random.Random(os.urandom(16))
+
+# Substrings in OCI error messages that mean "retry later", matched case-insensitively.
+_CAPACITY_INDICATORS = (
+    'out of host capacity',
+    'no sufficient compute capacity',
+    'insufficient capacity',
+    'capacity exceeded',
+    'OutOfCapacity',
+    'capacity.exceeded',
 )
-from oci.exceptions import ServiceError
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('oci_provisioning.log'),
-        logging.StreamHandler()
-    ]
+_CAPACITY_RE = re.compile('|'.join(re.escape(s) for s in _CAPACITY_INDICATORS), re.IGNORECASE)
+
+# Throttling / overload statuses: always retryable, usually accompanied by Retry-After.
+_THROTTLE_STATUSES = frozenset({429, 503})
+
+# ComputeClients keyed by (profile, region) so repeated provisioners in one
+# process reuse the same HTTP session / connection pool.
+_CLIENT_CACHE: Dict[Tuple[str, str], ComputeClient] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+# API-key signers per profile (building one parses the private key) and the single
+# HTTP session every client shares, so extra clients (other regions, VCN lookups, ...)
+# reuse the key and the keep-alive pool. Both are guarded by _CLIENT_CACHE_LOCK.
+_SIGNER_CACHE: Dict[str, Any] = {}
+_shared_http_session: Optional[Any] = None
+
+
+@functools.lru_cache(maxsize=None)
+def _lazy_import_oci() -> None:
+    """Import the OCI SDK into module globals on first call."""
+    global oci, from_file, ComputeClient, ServiceError
+    global CreateVnicDetails, InstanceSourceViaImageDetails, LaunchInstanceDetails, LaunchInstanceShapeConfigDetails
+    import oci
+    from oci.config import from_file
+    from oci.core import ComputeClient
+    from oci.core.models import (
+        CreateVnicDetails,
+        InstanceSourceViaImageDetails,
+        LaunchInstanceDetails,
+        LaunchInstanceShapeConfigDetails,
+    )
+    from oci.exceptions import ServiceError
+
+
+def _install_payload_cache(client: ComputeClient) -> Dict[int, Tuple[Any, Any]]:
+    """
+    Let a client's serializer return precomputed payloads for known request models.
+
+    BaseClient.call_api runs sanitize_for_serialization (a reflective walk over the
+    model's swagger_types) on the body of every request. Launch details don't change
+    between retries, so registered models short-circuit to their cached dict.
+    Returns the registry mapping id(model) -> (model, sanitized payload); the unwrapped
+    serializer stays available as base_client._uncached_sanitize_for_serialization.
+    Clients are shared process-wide, so callers must unregister their models when done.
+    """
+    base = client.base_client
+    registry = getattr(base, '_precomputed_payloads', None)
+    if registry is not None:
+        return registry
+
+    registry = {}
+    original = base.sanitize_for_serialization
+
+    def sanitize_for_serialization(obj, *args, **kwargs):
+        hit = registry.get(id(obj))
+        if hit is not None and hit[0] is obj:
+            return hit[1]
+        return original(obj, *args, **kwargs)
+
+    base.sanitize_for_serialization = sanitize_for_serialization
+    base._uncached_sanitize_for_serialization = original
+    base._precomputed_payloads = registry
+    return registry
+
+
+@functools.lru_cache(maxsize=16)
+def _load_sdk_config_cached(profile: str, region_override: Optional[str]) -> Mapping[str, Any]:
+    """Parse ~/.oci/config for a profile once per process; returns a read-only view."""
+    cfg = from_file(profile_name=profile)
+    if region_override is not None:
+        cfg['region'] = region_override
+    return types.MappingProxyType(cfg)
+
+
+def clear_config_cache() -> None:
+    """
+    Drop cached OCI SDK configs and the clients and signers built from them, e.g.
+    after `oci session authenticate` refreshed credentials.
+    """
+    with _CLIENT_CACHE_LOCK:
+        _load_sdk_config_cached.cache_clear()
+        _CLIENT_CACHE.clear()
+        _SIGNER_CACHE.clear()
+
+
+class CapacityHistory:
+    """
+    Empirical time-to-capacity data mined from previous runs in the provisioning log.
+
+    Each sample is the gap in seconds between a run's first capacity error and its
+    successful launch, grouped by (region, shape).
+    """
+
+    # Fewer samples than this and the learned schedule is noise; use geometric backoff.
+    MIN_SAMPLES = 20
+
+    # The log is append-only; only its tail is scanned so startup cost stays bounded.
+    MAX_SCAN_BYTES = 4 * 1024 * 1024
+
+    _TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S,%f'
+
+    def __init__(self, samples: Optional[Dict[Tuple[str, str], List[float]]] = None):
+        self.samples = samples or {}
+
+    @classmethod
+    def from_log(cls, path: str = LOG_FILE) -> 'CapacityHistory':
+        """
+        Parse the last MAX_SCAN_BYTES of a log written by this script; unreadable or
+        missing logs yield an empty history.
+        """
+        samples: Dict[Tuple[str, str], List[float]] = {}
+        # None until a run's header has been seen, so a run cut off by the scan window is skipped.
+        region = shape = None
+        first_capacity_error: Optional[datetime] = None
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                start = max(0, f.tell() - cls.MAX_SCAN_BYTES)
+                f.seek(start)
+                if start:
+                    f.readline()  # discard the partial first line
+                text = f.read().decode('utf-8', errors='replace')
+        except OSError:
+            return cls(samples)
+
+        for line in text.splitlines():
+            parts = line.split(' - ', 2)
+            if len(parts) != 3:
+                continue
+            msg = parts[2]
+            if msg.startswith('Starting OCI VM provisioning process'):
+                region = shape = first_capacity_error = None
+            elif msg.startswith('Shape: '):
+                shape = msg[len('Shape: '):]
+            elif msg.startswith('Region: '):
+                region = msg[len('Region: '):]
+            elif region is None or shape is None:
+                continue
+            elif msg.startswith('[RETRY] Capacity error') and first_capacity_error is None:
+                first_capacity_error = cls._parse_timestamp(parts[0])
+            elif msg.startswith('[SUCCESS]') and first_capacity_error is not None:
+                ts = cls._parse_timestamp(parts[0])
+                if ts is not None:
+                    gap = (ts - first_capacity_error).total_seconds()
+                    samples.setdefault((region, shape), []).append(gap)
+                first_capacity_error = None
+        return cls(samples)
+
+    @classmethod
+    def _parse_timestamp(cls, value: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(value, cls._TIMESTAMP_FORMAT)
+        except ValueError:
+            return None
+
+    def poll_schedule(
+        self, region: str, shape: str, polls: int, min_step: float, max_step: float
+    ) -> Optional[List[float]]:
+        """
+        Plan sleep durations between retries that minimize expected time-to-detection.
+
+        Poll offsets L_i (seconds after the first capacity error) follow the optimal
+        checking recurrence L_{i+1} = L_i + (F(L_i) - F(L_{i-1})) / f(L_i), where F/f are
+        the empirical CDF/density of past gaps; L_1 is picked by evaluating the expected
+        detection delay over the samples. Returns None when history is too sparse.
+        """
+        gaps = sorted(g for g in self.samples.get((str(region), str(shape)), []) if g >= 0)
+        if len(gaps) < self.MIN_SAMPLES or polls < 1 or gaps[-1] <= 0:
+            return None
+
+        # Histogram density model: piecewise-constant pdf, piecewise-linear cdf.
+        n = len(gaps)
+        upper = gaps[-1]
+        nbins = max(5, int(math.sqrt(n)))
+        width = upper / nbins
+        counts = [0] * nbins
+        for g in gaps:
+            counts[min(int(g / width), nbins - 1)] += 1
+        cumulative = [0]
+        for c in counts:
+            cumulative.append(cumulative[-1] + c)
+
+        def cdf(x: float) -> float:
+            if x <= 0:
+                return 0.0
+            if x >= upper:
+                return 1.0
+            i = int(x / width)
+            return (cumulative[i] + counts[i] * (x - i * width) / width) / n
+
+        def pdf(x: float) -> float:
+            if x < 0 or x >= upper:
+                return 0.0
+            return counts[int(x / width)] / (n * width)
+
+        def offsets_from(first: float) -> List[float]:
+            points = [first]
+            prev = 0.0
+            while len(points) < polls and points[-1] < upper:
+                cur = points[-1]
+                density = pdf(cur)
+                step = (cdf(cur) - cdf(prev)) / density if density > 0 else max_step
+                points.append(cur + min(max(step, min_step), max_step))
+                prev = cur
+            return points
+
+        def expected_delay(points: List[float]) -> float:
+            total = 0.0
+            for g in gaps:
+                i = bisect_left(points, g)
+                # Past the planned polls we fall back to backoff; charge a full max step.
+                detected = points[i] if i < len(points) else points[-1] + max_step
+                total += detected - g
+            return total / n
+
+        candidates = {min(max(g, min_step), max_step) for g in gaps[:: max(1, n // 50)]}
+        best = min((offsets_from(c) for c in candidates), key=expected_delay)
+        return [later - earlier for earlier, later in zip([0.0] + best, best)]
+
+
+def _retry_hint_seconds(headers: Optional[Mapping[str, Any]]) -> Optional[float]:
+    """Server-suggested wait from Retry-After (seconds or HTTP-date) or RateLimit-Reset, if present."""
+    if not headers:
+        return None
+    lowered = {str(k).lower(): v for k, v in headers.items()}
+    for name in ('retry-after', 'ratelimit-reset'):
+        value = lowered.get(name)
+        if value is None:
+            continue
+        value = str(value).strip()
+        try:
+            seconds = float(value)
+        except ValueError:
+            pass
+        else:
+            # float() accepts 'inf' / 'nan'; treat those as no hint at all.
+            if math.isfinite(seconds):
+                return max(0.0, seconds)
+            continue
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            continue
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    return None
+
+
+# Required vm_config fields: (field, required value prefix or None).
+_VM_CONFIG_SCHEMA: Tuple[Tuple[str, Optional[str]], ...] = (
+    ('compartment_id', 'ocid1.'),
+    ('image_id', 'ocid1.'),
+    ('shape', None),
+    ('subnet_id', 'ocid1.'),
 )
-logger = logging.getLogger(__name__)
+
+
+def _validate_flex(shape: str, shape_config: Optional[Dict[str, Any]]) -> None:
+    """Flex shapes generally require a shape_config payload (OCPUs/memory)."""
+    if 'Flex' not in shape:
+        return
+    sc = shape_config or {}
+    if sc.get('ocpus') is None or sc.get('memory_in_gbs') is None:
+        _fail("Flex shape requires vm_config.shape_config.ocpus and vm_config.shape_config.memory_in_gbs")
+
+
+def _availability_domains(vm_config: Dict[str, Any]) -> List[str]:
+    """Return the configured ADs: vm_config.availability_domains, else availability_domain (string or list)."""
+    ads = vm_config.get('availability_domains') or vm_config.get('availability_domain') or []
+    if isinstance(ads, str):
+        ads = [ads]
+    return [ad for ad in ads if ad]
+
+
+class LaunchResult(NamedTuple):
+    """Outcome of one launch attempt that didn't raise."""
+
+    instance_id: Optional[str] = None
+    # Server-suggested wait before retrying (Retry-After / RateLimit-Reset), if any.
+    retry_after: Optional[float] = None
+    # ServiceError code (or HTTP status) of a retryable failure.
+    error_code: Optional[str] = None
 
 
 def _fail(msg: str) -> NoReturn:
@@ -56,6 +418,8 @@ class OCIProvisioner:
             config_path: Path to the config.json file
             profile_override: Override OCI profile from command line
         """
+        # Library callers that never go through main() still need their records written.
+        _start_log_listener()
         self.config = self._load_config(config_path)
         self.profile = profile_override or os.getenv('OCI_PROFILE') or self.config.get('oci_profile', 'DEFAULT')
         self.vm_config = self.config.get('vm_config', {})
@@ -63,11 +427,37 @@ class OCIProvisioner:
         
         # Set defaults for retry config
         self.max_attempts = self.retry_config.get('max_attempts', 30)
-        self.initial_delay = self.retry_config.get('initial_delay_seconds', 5)
+        self.initial_delay = self.retry_config.get('initial_delay_seconds', 1)
         self.max_delay = self.retry_config.get('max_delay_seconds', 300)
-        self.backoff_multiplier = self.retry_config.get('backoff_multiplier', 1.5)
+        self.backoff_multiplier = self.retry_config.get('backoff_multiplier', 1.3)
+        self.poll_backoff_min = self.retry_config.get('poll_backoff_min', 0.1)
+        self.jitter_fraction = self.retry_config.get('jitter_fraction', 0.5)
+        self.max_parallel_launches = self.retry_config.get('max_parallel_launches', 3)
+        self.capacity_window = self.retry_config.get('capacity_window_seconds', 1800)
+
+        # Out-of-capacity windows rarely outlast capacity_window, so spreading the attempts over
+        # it (at twice the even spacing, never under 30s) beats sitting in max_delay sleeps.
+        self.delay_cap = min(self.max_delay, max(30, self.capacity_window / max(1, self.max_attempts) * 2))
+
+        self.availability_domains = _availability_domains(self.vm_config)
+        # (attempt, seconds waited afterwards, outcome) for the current run; summarized once at the end.
+        self._attempt_log: List[Tuple[int, float, str]] = []
+        # sanitize_for_serialization output per AD; launch details are static for a run.
+        self._sanitized_payloads: Dict[str, Any] = {}
+        # Models this provisioner registered with the shared client's payload cache.
+        self._registered_payloads: List[Any] = []
+
+        # Learned retry sleeps for this (region, shape), or empty to use jittered geometric backoff.
+        self._schedule: List[float] = CapacityHistory.from_log().poll_schedule(
+            str(self.vm_config.get('region')),
+            str(self.vm_config.get('shape')),
+            polls=self.max_attempts - 1,
+            min_step=self.poll_backoff_min,
+            max_step=self.delay_cap,
+        ) or []
         
         # Load OCI SDK config once and reuse across clients
+        _lazy_import_oci()
         self.oci_config = self._load_oci_sdk_config()
 
         # Initialize OCI SDK clients
@@ -75,14 +465,15 @@ class OCIProvisioner:
         
         logger.info(f"Initialized provisioner with profile: {self.profile}")
         logger.info(f"Max retry attempts: {self.max_attempts}")
+        if self._schedule:
+            logger.info(f"Using retry schedule learned from {LOG_FILE} ({len(self._schedule)} planned polls)")
 
     def _load_oci_sdk_config(self) -> Dict[str, Any]:
         """Load OCI SDK config (~/.oci/config) for the selected profile and apply region override."""
         try:
-            cfg = from_file(profile_name=self.profile)
-            if 'region' in self.vm_config:
-                cfg['region'] = self.vm_config['region']
-            return cfg
+            region_override = self.vm_config['region'] if 'region' in self.vm_config else None
+            # Hand out a private copy so callers can't mutate the cached entry.
+            return dict(_load_sdk_config_cached(self.profile, region_override))
         except Exception as e:
             logger.error(f"Failed to load OCI SDK config: {e}")
             sys.exit(1)
@@ -93,13 +484,65 @@ class OCIProvisioner:
             if 'region' in self.vm_config:
                 logger.info(f"Using region from config: {self.vm_config['region']}")
 
-            client = ComputeClient(self.oci_config)
-            logger.info(f"OCI Compute Client initialized with profile: {self.profile}")
+            key = (self.profile, self.oci_config.get('region', ''))
+            with _CLIENT_CACHE_LOCK:
+                self.signer = self._get_signer()
+                client = _CLIENT_CACHE.get(key)
+                if client is None:
+                    client = _CLIENT_CACHE[key] = self._new_client(ComputeClient)
+                    logger.info(f"OCI Compute Client initialized with profile: {self.profile}")
+                else:
+                    logger.debug(f"Reusing cached OCI Compute Client for profile: {self.profile}")
             return client
         except Exception as e:
             logger.error(f"Failed to initialize OCI Compute Client: {e}")
             sys.exit(1)
 
+    def _get_signer(self) -> Optional[Any]:
+        """
+        Return the shared API-key signer for this profile (caller holds _CLIENT_CACHE_LOCK).
+
+        Anything but a plain API-key profile (authentication_type such as Cloud Shell or
+        instance principals, delegation or security tokens) returns None so the SDK picks
+        its signer from the config itself, as before.
+        """
+        cfg = self.oci_config
+        if (
+            oci.util.AUTHENTICATION_TYPE_FIELD_NAME in cfg
+            or 'security_token_file' in cfg
+            or 'delegation_token_file' in cfg
+            or not all(cfg.get(k) for k in ('tenancy', 'user', 'fingerprint'))
+            or not (cfg.get('key_file') or cfg.get('key_content'))
+        ):
+            return None
+        signer = _SIGNER_CACHE.get(self.profile)
+        if signer is None:
+            # Same construction the SDK clients use internally when no signer is passed.
+            signer = _SIGNER_CACHE[self.profile] = oci.signer.Signer(
+                tenancy=cfg['tenancy'],
+                user=cfg['user'],
+                fingerprint=cfg['fingerprint'],
+                private_key_file_location=cfg.get('key_file'),
+                pass_phrase=oci.config.get_config_value_or_default(cfg, 'pass_phrase'),
+                private_key_content=cfg.get('key_content'),
+            )
+        return signer
+
+    def _new_client(self, client_cls: Any) -> Any:
+        """Construct an OCI service client with the shared signer and HTTP session (caller holds the lock)."""
+        global _shared_http_session
+        if self.signer is not None:
+            client = client_cls(self.oci_config, signer=self.signer)
+        else:
+            client = client_cls(self.oci_config)
+        # Reuse the first client's session rather than a new requests.Session(): the SDK
+        # uses its own vendored requests, and the session it creates is already configured.
+        if _shared_http_session is None:
+            _shared_http_session = client.base_client.session
+        else:
+            client.base_client.session = _shared_http_session
+        return client
+
     def _maybe_enable_oci_sdk_debug_logging(self) -> None:
         """Enable OCI SDK HTTP request/response logging when our log level is DEBUG."""
         try:
@@ -116,37 +559,24 @@ class OCIProvisioner:
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from JSON file."""
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            with open(config_path, 'rb') as f:
+                config = _json_loads(f.read())
             logger.info(f"Configuration loaded from {config_path}")
             
             # Validate required fields
             vm_config = config.get('vm_config', {})
-            required_fields = ['compartment_id', 'image_id', 'shape', 'subnet_id']
-            
-            for field in required_fields:
-                if not vm_config.get(field):
-                    logger.error(f"Missing required field in vm_config: {field}")
-                    sys.exit(1)
-                # Validate OCID format (should start with ocid1.)
-                if field in ['compartment_id', 'image_id', 'subnet_id']:
-                    if not vm_config[field].startswith('ocid1.'):
-                        logger.error(f"Invalid OCID format for {field}: {vm_config[field]}")
-                        sys.exit(1)
-
-            if not vm_config.get('availability_domain'):
-                logger.error("Missing required field in vm_config: availability_domain")
-                sys.exit(1)
-
-            # Flex shapes generally require a shape_config payload (OCPUs/memory).
-            shape = vm_config.get('shape', '')
-            if 'Flex' in shape:
-                sc = vm_config.get('shape_config') or {}
-                if sc.get('ocpus') is None or sc.get('memory_in_gbs') is None:
-                    logger.error(
-                        "Flex shape requires vm_config.shape_config.ocpus and vm_config.shape_config.memory_in_gbs"
-                    )
-                    sys.exit(1)
+            for name, prefix in _VM_CONFIG_SCHEMA:
+                value = vm_config.get(name)
+                if not value:
+                    _fail(f"Missing required field in vm_config: {name}")
+                if prefix and not (isinstance(value, str) and value.startswith(prefix)):
+                    _fail(f"Invalid OCID format for {name}: {value}")
+
+            # availability_domain may be given as a list via availability_domains instead.
+            if not _availability_domains(vm_config):
+                _fail("Missing required field in vm_config: availability_domain (or availability_domains)")
+
+            _validate_flex(vm_config.get('shape', ''), vm_config.get('shape_config'))
             
             return config
         except FileNotFoundError:
@@ -156,8 +586,9 @@ class OCIProvisioner:
             logger.error(f"Invalid JSON in config file: {e}")
             sys.exit(1)
 
-    def _load_ssh_authorized_keys(self) -> Optional[str]:
-        """Load SSH public key content from config.
+    @functools.cached_property
+    def ssh_authorized_keys(self) -> Optional[str]:
+        """SSH public key content from config, read from disk at most once per provisioner.
         """
         key_value = self.vm_config.get('ssh_public_key')
         if not key_value:
@@ -183,22 +614,21 @@ class OCIProvisioner:
 
         return key_text
     
-    def _is_capacity_error(self, error_message: str) -> bool:
-        """Check if the error is due to host capacity."""
-        capacity_indicators = [
-            'out of host capacity',
-            'no sufficient compute capacity',
-            'insufficient capacity',
-            'capacity exceeded',
-            'OutOfCapacity',
-            'capacity.exceeded'
-        ]
-        return any(indicator.lower() in error_message.lower() for indicator in capacity_indicators)
+    def _is_capacity_error(self, e: ServiceError) -> bool:
+        """Check if the error is due to host capacity.
+
+        Uses the structured code/status first and only falls back to scanning the message text.
+        """
+        code = getattr(e, 'code', '')
+        # "Out of host capacity" is reported as HTTP 500 / InternalError rather than its own code.
+        if code == 'OutOfCapacity' or (code == 'InternalError' and getattr(e, 'status', 0) == 500):
+            return True
+        return _CAPACITY_RE.search(getattr(e, 'message', '') or str(e)) is not None
     
-    def _build_launch_instance_details(self) -> LaunchInstanceDetails:
-        """Build LaunchInstanceDetails object from config."""
+    def _build_launch_instance_details(self, ad_name: Optional[str] = None) -> LaunchInstanceDetails:
+        """Build LaunchInstanceDetails object from config, targeting ad_name (default: first configured AD)."""
 
-        ad_name = self.vm_config.get('availability_domain')
+        ad_name = ad_name or self.availability_domains[0]
         compartment_id = self.vm_config.get('compartment_id')
         
         # Build source details from image
@@ -221,7 +651,7 @@ class OCIProvisioner:
                 memory_in_gbs=self.vm_config['shape_config'].get('memory_in_gbs'),
             )
 
-        ssh_keys = self._load_ssh_authorized_keys()
+        ssh_keys = self.ssh_authorized_keys
         metadata = {"ssh_authorized_keys": ssh_keys} if ssh_keys else None
 
         # Build launch instance details
@@ -242,39 +672,84 @@ class OCIProvisioner:
         logger.debug(f"Launch instance details: {launch_details}")
         return launch_details
     
-    def _launch_instance(self, launch_details: LaunchInstanceDetails) -> Optional[str]:
+    def _sanitized_payload(self, launch_details: LaunchInstanceDetails) -> Any:
+        """
+        Wire-format (JSON-ready) form of launch_details, computed at most once per AD.
+
+        Uses the client's own serializer, i.e. exactly what call_api would send.
+        """
+        key = launch_details.availability_domain
+        if key not in self._sanitized_payloads:
+            base = self.compute_client.base_client
+            serialize = getattr(base, '_uncached_sanitize_for_serialization', base.sanitize_for_serialization)
+            self._sanitized_payloads[key] = serialize(launch_details)
+        return self._sanitized_payloads[key]
+
+    def _precompute_payload(self, launch_details: LaunchInstanceDetails) -> None:
+        """Serialize launch_details once so every retry's request reuses the result."""
+        try:
+            registry = _install_payload_cache(self.compute_client)
+            payload = self._sanitized_payload(launch_details)
+            registry[id(launch_details)] = (launch_details, payload)
+            self._registered_payloads.append(launch_details)
+            hit = self.compute_client.base_client.sanitize_for_serialization(launch_details) is payload
+        except Exception as e:
+            logger.warning(f"Launch payload precomputation failed; serializing on every attempt: {e}")
+            return
+        if not hit:
+            logger.warning("Launch payload precomputation is not taking effect; serializing on every attempt")
+
+    def _release_payloads(self) -> None:
+        """Unregister this run's precomputed payloads from the (process-wide) client."""
+        # Runs in a finally block: nothing registered means nothing to touch on the client.
+        if not self._registered_payloads:
+            return
+        registry = getattr(self.compute_client.base_client, '_precomputed_payloads', None)
+        for launch_details in self._registered_payloads:
+            if registry is not None:
+                registry.pop(id(launch_details), None)
+        self._registered_payloads.clear()
+
+    def _launch_instance(self, launch_details: LaunchInstanceDetails) -> LaunchResult:
         """
         Attempt to launch an instance.
         
         Returns:
-            Instance ID if successful, None if failed
+            LaunchResult with instance_id set if successful, or with the retry hint and
+            error code of a retryable error. Non-retryable errors are raised.
         """
         try:
             response = self.compute_client.launch_instance(launch_details)
             instance_id = response.data.id
             logger.info(f"[SUCCESS] Instance launched successfully!")
             logger.info(f"Instance ID: {instance_id}")
-            return instance_id
+            return LaunchResult(instance_id=instance_id)
         except ServiceError as e:
-            error_msg = str(e)
-            logger.debug(f"OCI ServiceError: {e}")
+            error_msg = getattr(e, 'message', '') or str(e)
+            logger.debug("OCI ServiceError: %s", e)
+            hint = _retry_hint_seconds(getattr(e, 'headers', None))
+            code = getattr(e, 'code', None) or str(getattr(e, 'status', ''))
             
             # Check if it's a capacity error
-            if self._is_capacity_error(error_msg):
-                logger.warning(f"[RETRY] Capacity error: {e.message if hasattr(e, 'message') else error_msg}")
-                return None
+            if self._is_capacity_error(e):
+                logger.warning(f"[RETRY] Capacity error: {error_msg}")
+                return LaunchResult(retry_after=hint, error_code=code)
+            elif getattr(e, 'status', 0) in _THROTTLE_STATUSES:
+                logger.warning(f"[RETRY] Throttled ({e.status}): {error_msg}")
+                return LaunchResult(retry_after=hint, error_code=code)
             else:
                 # Non-capacity error - print full details for debugging
-                logger.error(f"[FAILED] Non-retryable error: {e.message if hasattr(e, 'message') else error_msg}")
-                if hasattr(e, '__dict__'):
-                    logger.debug(f"Full error details: {e.__dict__}")
+                logger.error(f"[FAILED] Non-retryable error: {error_msg}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    if hasattr(e, '__dict__'):
+                        logger.debug(f"Full error details: {e.__dict__}")
 
-                # When debugging 400 CannotParseRequest, seeing the exact payload helps.
-                try:
-                    logger.debug("Launch payload (sanitized for serialization):")
-                    logger.debug(json.dumps(oci.util.sanitize_for_serialization(launch_details), indent=2))
-                except Exception:
-                    logger.debug(f"Launch payload (str): {launch_details}")
+                    # When debugging 400 CannotParseRequest, seeing the exact payload helps.
+                    try:
+                        logger.debug("Launch payload (sanitized for serialization):")
+                        logger.debug(_json_dumps_pretty(self._sanitized_payload(launch_details)))
+                    except Exception:
+                        logger.debug(f"Launch payload (str): {launch_details}")
                 raise
         except Exception as e:
             logger.error(f"[FAILED] Unexpected error: {e}")
@@ -282,58 +757,269 @@ class OCIProvisioner:
             logger.debug(f"Traceback: {traceback.format_exc()}")
             raise
     
+    def _jittered(self, delay: float) -> float:
+        """Spread a nominal backoff delay by +/- jitter_fraction so parallel runs don't retry in lockstep."""
+        spread = delay * self.jitter_fraction
+        return _jitter_rng.uniform(max(0.0, delay - spread), delay + spread)
+
+    def _sleep_before_retry(self, step: int, current_delay: float, hint: Optional[float] = None) -> float:
+        """
+        Seconds to wait after the step-th consecutive failure: the server's retry hint if
+        given, else the learned schedule if available, else jittered backoff.
+        """
+        if hint is not None:
+            # Trust the server, but never sleep longer than max_delay on its say-so.
+            return max(self.poll_backoff_min, min(hint, self.max_delay))
+        if step <= len(self._schedule):
+            planned = self._schedule[step - 1]
+        else:
+            planned = self._jittered(current_delay)
+        return max(self.poll_backoff_min, min(planned, self.delay_cap))
+
+    def _advance_backoff(
+        self, step: int, current_delay: float, last_error_code: Optional[str], error_code: Optional[str]
+    ) -> Tuple[int, float]:
+        """
+        Count another consecutive failure, restarting the schedule if the error class changed.
+
+        A switch such as capacity -> throttling means the conditions the old delay was tuned
+        for no longer hold, so backoff starts over from initial_delay.
+        """
+        if last_error_code is not None and error_code != last_error_code:
+            logger.info(f"  Error changed ({last_error_code} -> {error_code}); restarting backoff")
+            return 1, self.initial_delay
+        return step + 1, current_delay
+
+    def _next_delay(self, delay: float) -> float:
+        """Advance the nominal (pre-jitter) backoff delay by one step."""
+        return min(delay * self.backoff_multiplier, self.delay_cap)
+
+    def _log_attempt_summary(self, elapsed: float, concurrent: bool = False) -> None:
+        """
+        Log all attempts of the run as one compact table instead of per-attempt lines.
+
+        Waits are measured, not planned. With concurrent probes they overlap, so only the
+        wall-clock elapsed time is reported rather than their sum.
+        """
+        if not self._attempt_log:
+            return
+        if concurrent:
+            header = (
+                f"Attempt summary: {len(self._attempt_log)} attempt(s) across availability domains, "
+                f"{elapsed:.1f}s elapsed (per-AD waits overlap)"
+            )
+        else:
+            waited = sum(wait for _, wait, _ in self._attempt_log)
+            header = f"Attempt summary: {len(self._attempt_log)} attempt(s), {waited:.1f}s spent waiting, {elapsed:.1f}s elapsed"
+        lines = [header, f"  {'#':>4}  {'wait(s)':>8}  result"]
+        lines.extend(f"  {attempt:>4}  {wait:>8.1f}  {outcome}" for attempt, wait, outcome in self._attempt_log)
+        logger.info("\n".join(lines))
+
     def provision_vm_with_retry(self) -> bool:
         """
         Provision a VM with retry logic for capacity errors.
+
+        With the default retry_config (1s initial delay, 1.3x multiplier) the nominal
+        waits are ~1, 1.3, 1.7, 2.2, 2.9, 3.7, 4.8, 6.3, 8.2, 10.6s..., keeping the
+        first minute densely polled since capacity often frees up in short bursts.
+        Each wait is jittered and never drops below poll_backoff_min.
         
         Returns:
             True if VM was successfully provisioned, False otherwise
         """
         launch_details = self._build_launch_instance_details()
+        self._precompute_payload(launch_details)
         attempt = 0
+        step = 0
         current_delay = self.initial_delay
+        last_error_code = None
         
         logger.info("=" * 70)
         logger.info("Starting OCI VM provisioning process")
         logger.info(f"Instance name: {self.vm_config.get('display_name')}")
         logger.info(f"Shape: {self.vm_config.get('shape')}")
         logger.info(f"Region: {self.vm_config.get('region')}")
+        logger.info(f"Availability domain: {launch_details.availability_domain}")
         logger.info("=" * 70)
+        if len(self.availability_domains) > 1:
+            logger.info("Multiple ADs configured; only the first is tried (use --parallel-ads to race all of them)")
         
-        while attempt < self.max_attempts:
-            attempt += 1
-            logger.info(f"\n[Attempt {attempt}/{self.max_attempts}] Launching instance...")
+        self._attempt_log.clear()
+        started = time.monotonic()
+        try:
+            while attempt < self.max_attempts:
+                attempt += 1
+                logger.debug(f"[Attempt {attempt}/{self.max_attempts}] Launching instance...")
             
-            try:
-                instance_id = self._launch_instance(launch_details)
+                try:
+                    result = self._launch_instance(launch_details)
                 
-                if instance_id:
-                    # Success
-                    logger.info("=" * 70)
-                    logger.info("VM PROVISIONING COMPLETED SUCCESSFULLY")
-                    logger.info("=" * 70)
-                    return True
-                else:
-                    # Capacity error - retry
-                    if attempt < self.max_attempts:
-                        next_delay = min(current_delay * self.backoff_multiplier, self.max_delay)
-                        logger.info(f"  Waiting {current_delay:.1f}s before retry... (next delay: {next_delay:.1f}s)")
-                        time.sleep(current_delay)
-                        current_delay = next_delay
+                    if result.instance_id:
+                        # Success
+                        self._attempt_log.append((attempt, 0.0, 'OK'))
+                        logger.info("=" * 70)
+                        logger.info("VM PROVISIONING COMPLETED SUCCESSFULLY")
+                        logger.info("=" * 70)
+                        return True
                     else:
-                        logger.error(f"[FAILED] Max retry attempts ({self.max_attempts}) reached. Giving up.")
-                        return False
+                        # Capacity error or throttling - retry
+                        if attempt < self.max_attempts:
+                            step, current_delay = self._advance_backoff(step, current_delay, last_error_code, result.error_code)
+                            last_error_code = result.error_code
+                            next_delay = self._next_delay(current_delay)
+                            sleep_for = self._sleep_before_retry(step, current_delay, result.retry_after)
+                            logger.debug(f"  Waiting {sleep_for:.1f}s before retry... (next delay: ~{next_delay:.1f}s)")
+                            sleep_started = time.monotonic()
+                            time.sleep(sleep_for)
+                            self._attempt_log.append((attempt, time.monotonic() - sleep_started, str(result.error_code)))
+                            current_delay = next_delay
+                        else:
+                            self._attempt_log.append((attempt, 0.0, str(result.error_code)))
+                            logger.error(f"[FAILED] Max retry attempts ({self.max_attempts}) reached. Giving up.")
+                            return False
             
-            except ServiceError as e:
-                # Non-retryable error
-                return False
-            except Exception as e:
-                logger.error(f"[FAILED] Unexpected error: {e}")
-                return False
+                except ServiceError as e:
+                    # Non-retryable error
+                    self._attempt_log.append((attempt, 0.0, str(getattr(e, 'code', None) or 'FAILED')))
+                    return False
+                except Exception as e:
+                    self._attempt_log.append((attempt, 0.0, 'FAILED'))
+                    logger.error(f"[FAILED] Unexpected error: {e}")
+                    return False
         
-        logger.error(f"[FAILED] Failed to provision VM after {self.max_attempts} attempts")
+            logger.error(f"[FAILED] Failed to provision VM after {self.max_attempts} attempts")
+            return False
+        finally:
+            self._release_payloads()
+            self._log_attempt_summary(time.monotonic() - started)
+
+    def provision_vm_parallel(self) -> bool:
+        """
+        Provision a VM by racing launch attempts across all configured availability domains.
+
+        Capacity is tracked per AD, so each AD gets its own retry loop and backoff schedule.
+        The first AD to launch wins; the others stop before their next attempt.
+
+        Returns:
+            True if VM was successfully provisioned, False otherwise
+        """
+        if len(self.availability_domains) < 2:
+            logger.info("Only one availability domain configured; falling back to sequential retry")
+            return self.provision_vm_with_retry()
+
+        logger.info("=" * 70)
+        logger.info("Starting OCI VM provisioning process (parallel ADs)")
+        logger.info(f"Instance name: {self.vm_config.get('display_name')}")
+        logger.info(f"Shape: {self.vm_config.get('shape')}")
+        logger.info(f"Region: {self.vm_config.get('region')}")
+        logger.info(f"Availability domains: {', '.join(self.availability_domains)}")
+        logger.info(f"Max concurrent launch calls: {self.max_parallel_launches}")
+        logger.info("=" * 70)
+
+        self._attempt_log.clear()
+        started = time.monotonic()
+        try:
+            instance_id = asyncio.run(self._race_availability_domains())
+        finally:
+            self._release_payloads()
+            self._log_attempt_summary(time.monotonic() - started, concurrent=True)
+        if instance_id:
+            logger.info("=" * 70)
+            logger.info("VM PROVISIONING COMPLETED SUCCESSFULLY")
+            logger.info("=" * 70)
+            return True
+
+        logger.error(f"[FAILED] Failed to provision VM in any AD after {self.max_attempts} attempts each")
         return False
 
+    async def _race_availability_domains(self) -> Optional[str]:
+        """Run one probe per AD and return the first instance ID launched, if any."""
+        # Bound concurrent launch calls to stay within per-tenancy API rate limits.
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel_launches))
+        stop = asyncio.Event()
+        pending = {
+            asyncio.create_task(self._probe_availability_domain(ad, semaphore, stop))
+            for ad in self.availability_domains
+        }
+
+        launched: List[str] = []
+
+        def collect(outcome: Any) -> None:
+            # Every finished probe is inspected: one that launched must never go unreported.
+            if isinstance(outcome, BaseException):
+                logger.error(f"[FAILED] Availability domain probe crashed: {outcome!r}")
+            elif outcome:
+                launched.append(outcome)
+
+        while pending and not launched:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                collect(task.exception() or task.result())
+
+        # Peers are signalled rather than cancelled: a launch call already running in the
+        # executor can't be interrupted, and its outcome must not be lost.
+        stop.set()
+        for outcome in await asyncio.gather(*pending, return_exceptions=True):
+            collect(outcome)
+
+        if not launched:
+            return None
+        for extra in launched[1:]:
+            logger.warning(f"[WARNING] A second instance was launched concurrently: {extra} (terminate it if unneeded)")
+        return launched[0]
+
+    async def _probe_availability_domain(
+        self, ad_name: str, semaphore: asyncio.Semaphore, stop: asyncio.Event
+    ) -> Optional[str]:
+        """Retry launches in a single AD until success, a non-retryable error, max attempts, or stop."""
+        loop = asyncio.get_running_loop()
+        launch_details = self._build_launch_instance_details(ad_name)
+        self._precompute_payload(launch_details)
+        step = 0
+        current_delay = self.initial_delay
+        last_error_code = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            if stop.is_set():
+                return None
+            async with semaphore:
+                if stop.is_set():
+                    return None
+                logger.debug(f"[{ad_name}] [Attempt {attempt}/{self.max_attempts}] Launching instance...")
+                try:
+                    result = await loop.run_in_executor(None, self._launch_instance, launch_details)
+                except Exception:
+                    self._attempt_log.append((attempt, 0.0, f"{ad_name} FAILED"))
+                    # _launch_instance has already logged the failure.
+                    logger.error(f"[{ad_name}] Giving up on this availability domain")
+                    return None
+
+            if result.instance_id:
+                self._attempt_log.append((attempt, 0.0, f"{ad_name} OK"))
+                return result.instance_id
+            if attempt == self.max_attempts:
+                self._attempt_log.append((attempt, 0.0, f"{ad_name} {result.error_code}"))
+                break
+
+            step, current_delay = self._advance_backoff(step, current_delay, last_error_code, result.error_code)
+            last_error_code = result.error_code
+            sleep_for = self._sleep_before_retry(step, current_delay, result.retry_after)
+            logger.debug(f"[{ad_name}]   Waiting {sleep_for:.1f}s before retry...")
+            sleep_started = time.monotonic()
+            try:
+                # Wake early if another AD already succeeded.
+                await asyncio.wait_for(stop.wait(), timeout=sleep_for)
+                stopped = True
+            except asyncio.TimeoutError:
+                stopped = False
+            self._attempt_log.append((attempt, time.monotonic() - sleep_started, f"{ad_name} {result.error_code}"))
+            if stopped:
+                return None
+            current_delay = self._next_delay(current_delay)
+
+        logger.error(f"[{ad_name}] Max retry attempts ({self.max_attempts}) reached")
+        return None
+
 
 def main():
     """Main entry point."""
@@ -346,6 +1032,7 @@ Examples:
   python main.py --profile PRODUCTION               # Use PRODUCTION profile
   python main.py --config staging-config.json       # Use custom config file
   python main.py --profile PROD --config prod.json  # Both custom profile and config
+  python main.py --parallel-ads                     # Race launches across all configured ADs
         '''
     )
     parser.add_argument(
@@ -366,6 +1053,11 @@ Examples:
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
         help='Logging level (default: INFO)'
     )
+    parser.add_argument(
+        '--parallel-ads',
+        action='store_true',
+        help='Race launch attempts across all configured availability domains concurrently'
+    )
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -373,6 +1065,7 @@ Examples:
     )
     
     args = parser.parse_args()
+    _start_log_listener()
     
     # Set log level
     logger.setLevel(getattr(logging, args.log_level))
@@ -390,13 +1083,16 @@ Examples:
         launch_details = provisioner._build_launch_instance_details()
         logger.info("DRY RUN: launch payload below (no instance will be created)")
         try:
-            logger.info(json.dumps(oci.util.sanitize_for_serialization(launch_details), indent=2))
+            logger.info(_json_dumps_pretty(provisioner._sanitized_payload(launch_details)))
         except Exception:
             # Fallback: this is *not* the wire format, just a readable representation
             logger.info(str(launch_details))
         sys.exit(0)
 
-    success = provisioner.provision_vm_with_retry()
+    if args.parallel_ads:
+        success = provisioner.provision_vm_parallel()
+    else:
+        success = provisioner.provision_vm_with_retry()
     
     sys.exit(0 if success else 1)
 